@@ -1,16 +1,47 @@
 """Write a CSON file
 """
-from io import TextIOBase
-from typing import Union
+from io import TextIOBase, BufferedIOBase
+from typing import Union, List
 from numbers import Number
 from collections.abc import Iterable, Mapping
-from contextlib import contextmanager
 CSONable = Union[None, bool, Number, Iterable, Mapping, str]
+# number of characters to hold before writing to file
+BUFFER_SIZE = 1 << 16
+
+
+def _escape(text: str) -> str:
+    """Escape the characters that are special inside CSON strings.
+    """
+    # str.translate with a dict is far slower than a couple of replaces
+    return text.replace('\\', '\\\\').replace('"', '\\"')
+
+
+_KINDS = {str: 'str', dict: 'dict', list: 'list', tuple: 'list',
+          bool: 'bool', int: 'num', float: 'num', type(None): 'null'}
+
+
+def _kind(data: CSONable) -> str:
+    """Which kind of CSON value is this?
+    """
+    kind = _KINDS.get(type(data))
+    if kind is not None:
+        return kind
+    if isinstance(data, str):
+        return 'str'
+    if isinstance(data, Mapping):
+        return 'dict'
+    if isinstance(data, Iterable):
+        return 'list'
+    if isinstance(data, Number):
+        return 'num'
+    raise TypeError(f'Unknown data type: {type(data)}.')
 
 
 class CSONWriter():
     """Class for writing to a CSON file
 
+    Converts with `_emit`, the same as `dump`, and buffers the text.
+
     Parameters
     ----------
     file : io.TextIO
@@ -23,31 +54,27 @@ class CSONWriter():
     file: TextIOBase
     indent: int = 4
     level: int = 0
-    parent: str
+    _buf: List[str]
+    _size: int
 
     def __init__(self, file: TextIOBase, indent: int = 4, level: int = 0):
         self.file = file
         self.indent = indent
         self.level = level
-        self.parent = ''
+        self._buf = []
+        self._size = 0
 
-    @contextmanager
-    def indented(self, parent: str):
-        """Context manager for one level deeper indent
+    def pad(self) -> str:
+        """Indentation string for current level.
+        """
+        return ' ' * (self.indent * max(self.level, 0))
 
-        Parameters
-        ----------
-        parent : str
-            type of thing at one level up indent
+    def flush(self):
+        """Write buffered text to the CSON file.
         """
-        old_parent = self.parent
-        self.parent = parent
-        self.level += 1
-        try:
-            yield
-        finally:
-            self.level -= 1
-            self.parent = old_parent
+        self.file.write(''.join(self._buf))
+        self._buf.clear()
+        self._size = 0
 
     def write_raw(self, text: str, started: bool = False, ended: bool = False):
         """Write raw text to a CSON file.
@@ -62,93 +89,14 @@ class CSONWriter():
             New line after writing? By default False.
         """
         if started:
-            text = (' ' * (self.indent * self.level)) + text
+            text = self.pad() + text
         if ended:
             text += '\n'
         if text:
-            self.file.write(text)
-
-    def write_str(self, text: str):
-        """Write a string to a CSON file.
-
-        Parameters
-        ----------
-        text : str
-            String to write to `self.file`.
-        """
-        if '\n' in text:
-            self.write_raw('"""', ended=True)
-            for line in text.splitlines():
-                self.write_raw(line, True, True)
-            self.write_raw('"""', True)
-        else:
-            self.write_raw('"' + text + '"')
-
-    def write_num(self, value: Number):
-        """Write a number to a CSON file.
-
-        Parameters
-        ----------
-        value : Number
-            Number to write to `self.file`.
-        """
-        self.write_raw(str(value))
-
-    def write_bool(self, value: bool):
-        """Write a boolean to a CSON file.
-
-        Parameters
-        ----------
-        value : bool
-            Boolean to write to `self.file`.
-        """
-        if value:
-            self.write_raw('true')
-        else:
-            self.write_raw('false')
-
-    def write_null(self):
-        """Write a null to a CSON file.
-        """
-        self.write_raw('null')
-
-    def write_dict(self, thing: dict):
-        """Write a dict to a CSON file.
-
-        Parameters
-        ----------
-        thing : dict
-            Dictionary to write to `self.file`.
-        """
-        remaining = len(thing)
-        if self.parent == 'list':
-            self.write_raw('{', ended=True)
-            remaining += 1
-        elif self.parent == 'dict':
-            self.write_raw('', ended=True)
-        with self.indented('dict'):
-            for key, value in thing.items():
-                remaining -= 1
-                self.write_raw(f'"{key}": ', True, False)
-                self.write(value, False, remaining)
-        if self.parent == 'list':
-            self.write_raw('}', True)
-        else:
-            self.write_raw('', False)
-
-    def write_list(self, array: list):
-        """Write a list to a CSON file.
-
-        Parameters
-        ----------
-        array : list
-            List to write to `self.file`.
-        """
-        self.write_raw('[', ended=True)
-        with self.indented('list'):
-            for element in array:
-                self.write(element, True, True)
-        self.write_raw(']', True)
+            self._buf.append(text)
+            self._size += len(text)
+            if self._size > BUFFER_SIZE:
+                self.flush()
 
     def write(self, data: CSONable, started: bool = False, ended: bool = True):
         """Write piece of data to a CSON file.
@@ -162,22 +110,84 @@ class CSONWriter():
         ended : bool, optional
             New line after writing? By default True.
         """
-        self.write_raw('', started, False)
-        if isinstance(data, str):
-            self.write_str(data)
-        elif isinstance(data, Mapping):
-            self.write_dict(data)
-        elif isinstance(data, Iterable):
-            self.write_list(data)
-        elif isinstance(data, Number):
-            self.write_num(data)
-        elif isinstance(data, bool):
-            self.write_bool(data)
-        elif data is None:
-            self.write_null()
+        pieces = _emit(data, ' ' * self.indent, self.level, ended)
+        self.write_raw(''.join(pieces), started)
+        self.flush()
+
+
+def _emit(obj: CSONable, tab: str, level: int = 0,
+          ended: bool = True) -> List[str]:
+    """Make the pieces of text for a piece of data in a CSON file.
+
+    Walks the data with a stack rather than recursion. The stack holds `str`s to emit as is, and tuples of
+    `(data, level, parent, ended)` still to be converted, in reverse order.
+
+    Parameters
+    ----------
+    obj : CSONable = Union[None, bool, Number, Iterable, Mapping, str]
+        Thing to write.
+    tab : str
+        Whitespace for one indent level.
+    level : int, optional, default = 0
+        Indent level of `obj`.
+    ended : bool, optional, default = True
+        New line after `obj`?
+
+    Returns
+    -------
+    pieces : List[str]
+        Text to write, in order.
+    """
+    pieces = []
+    stack = [(obj, level, '', ended)]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+            continue
+        data, level, parent, ended = item
+        kind = _kind(data)
+        if kind == 'dict':
+            # only dicts in lists get braces, nested dicts start a new line
+            if parent == 'list':
+                pieces.append('{\n')
+            elif parent == 'dict':
+                pieces.append('\n')
+            close = f'{tab * level}}}' if parent == 'list' else ''
+            stack.append(close + '\n' if ended else close)
+            entries = list(data.items())
+            pad = tab * (level + 1)
+            last = len(entries) - 1
+            for num in range(last, -1, -1):
+                key, value = entries[num]
+                more = num < last or parent == 'list'
+                stack.append((value, level + 1, 'dict', more))
+                stack.append(f'{pad}"{_escape(key)}": ')
+            continue
+        if kind == 'list':
+            pieces.append('[\n')
+            stack.append(f'{tab * level}]\n' if ended else f'{tab * level}]')
+            pad = tab * (level + 1)
+            for element in reversed(list(data)):
+                stack.append((element, level + 1, 'list', True))
+                stack.append(pad)
+            continue
+        if kind == 'str':
+            text = _escape(data)
+            if '\n' in text:
+                pad = tab * level
+                lines = f'\n{pad}'.join(text.splitlines())
+                text = f'"""\n{pad}{lines}\n{pad}"""'
+            else:
+                text = f'"{text}"'
+        elif kind == 'bool':
+            text = 'true' if data else 'false'
+        elif kind == 'null':
+            text = 'null'
         else:
-            raise TypeError(f'Unknown data type: {type(data)}.')
-        self.write_raw('', False, ended)
+            text = str(data)
+        pieces.append(text + '\n' if ended else text)
+    return pieces
 
 
 def dump(obj: CSONable, file: TextIOBase, indent: int = 4, level: int = 0):
@@ -195,5 +205,23 @@ def dump(obj: CSONable, file: TextIOBase, indent: int = 4, level: int = 0):
         Indent level of `obj`. If `obj` is a `dict` choose `-1` if you want its
         entries to have 0 indent.
     """
-    cson_file = CSONWriter(file, indent, level)
-    cson_file.write(obj)
+    file.write(''.join(_emit(obj, ' ' * indent, level)))
+
+
+def dump_bytes(obj: CSONable, file: BufferedIOBase, indent: int = 4,
+               level: int = 0):
+    """Write to a CSON file opened in binary mode, encoded as UTF-8.
+
+    Parameters
+    ----------
+    obj : CSONable = Union[None, bool, Number, Iterable, Mapping, str]
+        Thing to write to `file`.
+    file : io.BufferedIOBase
+        Binary file object for snippet `.cson` file.
+    indent : int, optional, default = 4
+        Number of spaces per indent level.
+    level : int, optional, default = 0
+        Indent level of `obj`. If `obj` is a `dict` choose `-1` if you want its
+        entries to have 0 indent.
+    """
+    file.write(''.join(_emit(obj, ' ' * indent, level)).encode('utf-8'))
@@ -11,11 +11,15 @@ write_data_json
 """
 import re
 import json
-from io import TextIOBase
-from typing import Tuple, Union, List, Dict, Sequence
+from typing import Tuple, Union, List, Dict, Sequence, Iterator
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 Body = Union[str, List[str]]
 Snippet = Dict[str, Body]
+Templates = Dict[str, List[str]]
 
 # regex building blocks
 TEMPLATE_PRE = (
@@ -28,19 +32,51 @@ BACK_SOME = r"CharLeft\((\d)\);"
 END_GROUP = "EndGroup;$"
 
 # regex for reading Winedt data
-TRIGGER = re.compile(r'^STRING="(\S*)  "$')
-MACRO = re.compile(r'^  MACRO="\[(.*)\]"$')
-TEMPLATE_ONE = re.compile(TEMPLATE_PRE + LINE_UP + "$")
-TEMPLATE_ONES = re.compile(TEMPLATE_PRE + LINE_UP + BACK_ONE + "$")
-TEMPLATE_ZERO = re.compile(TEMPLATE_PRE + "$")
-INSERT_TWO = re.compile(INSERT_PRE + BACK_ONE + BACK_SOME + END_GROUP)
-INSERT_ONE = re.compile(INSERT_PRE + BACK_ONE + END_GROUP)
-INSERT_ONES = re.compile(INSERT_PRE + BACK_SOME + END_GROUP)
-INSERT_ZERO = re.compile(INSERT_PRE + END_GROUP)
-TAB_STOP = re.compile(r'(?<!\\)\$\d')
-
-TEMPLATES = (TEMPLATE_ZERO, TEMPLATE_ONES, TEMPLATE_ONE)
-INSERTS = (INSERT_ZERO, INSERT_ONE, INSERT_ONES, INSERT_TWO)
+ENTRY = re.compile(r'^STRING="(\S*)  "\n(?:.*\n){2}  MACRO="\[(.*)\]"$',
+                   re.MULTILINE | re.ASCII)
+TEMPLATE_VARIANTS = (
+    ('t_zero', ''),
+    ('t_ones', LINE_UP + BACK_ONE),
+    ('t_one', LINE_UP),
+)
+INSERT_VARIANTS = (
+    ('i_zero', ''),
+    ('i_one', BACK_ONE),
+    ('i_ones', BACK_SOME),
+    ('i_two', BACK_ONE + BACK_SOME),
+)
+TAB_STOP = re.compile(r'(?<!\\)\$\d', re.ASCII)
+TEMPLATE = re.compile(r'^(\S+)\n(.*?)^-\1-$',
+                      re.MULTILINE | re.DOTALL | re.ASCII)
+
+
+def _combine(pre: str, variants: Sequence[Tuple[str, str]],
+             post: str = "$") -> re.Pattern:
+    """Combine alternative macro endings into one pattern with named groups.
+
+    Parameters
+    ----------
+    pre : str
+        Regex for the part shared by all alternatives.
+    variants : Sequence[Tuple[str, str]]
+        Pairs of (group name, regex) for the alternative endings.
+    post : str, optional
+        Regex for the part after the alternatives, by default `"$"`.
+
+    Returns
+    -------
+    pattern : re.Pattern
+        Compiled regex, `pre` followed by a named group for each variant.
+    """
+    tails = "|".join(f"(?P<{name}>{tail}{post})" for name, tail in variants)
+    return re.compile(pre + "(?:" + tails + ")", re.ASCII)
+
+
+TEMPLATES = _combine(TEMPLATE_PRE, TEMPLATE_VARIANTS)
+INSERTS = _combine(INSERT_PRE, INSERT_VARIANTS, END_GROUP)
+VARIANT_INDEX = {name: index
+                 for variants in (TEMPLATE_VARIANTS, INSERT_VARIANTS)
+                 for index, (name, _) in enumerate(variants)}
 
 # mode recognition
 TEXT_START = (
@@ -67,11 +103,19 @@ MATHS_START = (
     '\\dot',
     '\\ddot',
     '\\bar',
-    '\\bar',
     '\\vec',
     '\\hat',
     '\\tilde',
 )
+MATHS_TOKENS = ('_', '^', '\\frac')
+MATHS_TEXT_START = ('\\textstyle', '\\text{}')
+
+
+def _escape_line(body: str) -> str:
+    """Escape special characters in one line of a snippet.
+    """
+    body = body.replace(r'\""""', r'\"')
+    return body.replace('$', '\\$')
 
 
 def escape_body(body: Body) -> Body:
@@ -88,9 +132,16 @@ def escape_body(body: Body) -> Body:
         Input with dollar signs escaped.
     """
     if isinstance(body, list):
-        return [escape_body(txt) for txt in body]
-    body = body.replace(r'\""""', r'\"')
-    return body.replace('$', '\\$')
+        return [_escape_line(txt) for txt in body]
+    return _escape_line(body)
+
+
+def _describe_line(body: str) -> str:
+    """Remove tab-stops and escapes from one line of a snippet.
+    """
+    if '$' not in body:
+        return body
+    return TAB_STOP.sub('', body, count=9).replace('\\$', '$')
 
 
 def make_description(body: Body, trigger: str) -> str:
@@ -108,15 +159,17 @@ def make_description(body: Body, trigger: str) -> str:
     description : str
         Attempted snippet description.
     """
-    if isinstance(body, list):
-        describe = make_description(body[0], trigger)
-        if describe.startswith(('%====', '%----')):
-            if trigger.startswith('c'):
-                describe = ";".join([x[:10] for x in body])
-                return "Divider: " + describe
-            return make_description(body[1:], trigger)
-        return describe.lstrip('%&')
-    return TAB_STOP.sub('', body, count=9).replace('\\$', '$')
+    if not isinstance(body, list):
+        return _describe_line(body)
+    # skip divider lines, unless the snippet is a divider
+    for line in body:
+        describe = _describe_line(line)
+        if not describe.startswith(('%====', '%----')):
+            return describe.lstrip('%&')
+        if trigger.startswith('c'):
+            describe = ";".join([x[:10] for x in body])
+            return "Divider: " + describe
+    return ''
 
 
 def choose_mode(body: Body, trigger: str) -> str:
@@ -142,17 +195,14 @@ def choose_mode(body: Body, trigger: str) -> str:
         return "text"
     if body.count('\\$') >= 2:
         return "text"
-    if trigger.startswith('w') and not body.startswith('\\'):
-        return "text"
-    if trigger.startswith('w') and body.startswith('\\'):
-        return "maths"
-    if trigger.startswith('o') and body.startswith('('):
-        return "maths"
-    if trigger.startswith('x'):
+    kind = trigger[:1]
+    if kind == 'w':
+        return "maths" if body.startswith('\\') else "text"
+    if kind == 'x' or (kind == 'o' and body.startswith('(')):
         return "maths"
-    if any(x in body for x in ('_', '^', '\\frac')):
+    if any(token in body for token in MATHS_TOKENS):
         return "maths"
-    if body.startswith(('\\textstyle', '\\text{}')):
+    if body.startswith(MATHS_TEXT_START):
         return "maths"
     if body.startswith(TEXT_START):
         return "text"
@@ -161,8 +211,8 @@ def choose_mode(body: Body, trigger: str) -> str:
     return "any"
 
 
-def read_dat(file_name: str) -> List[str]:
-    """Read .dat file containing templates.
+def load_templates(file_name: str) -> Templates:
+    """Read template snippets from .dat file.
 
     Parameters
     ----------
@@ -171,135 +221,90 @@ def read_dat(file_name: str) -> List[str]:
 
     Returns
     -------
-    lines : List[str]
-        List of text lines from Winedt `.dat` file of multi-line template
-        snippets.
+    templates : Templates = Dict[str, List[str]]
+        Dict of escaped text lines of body, without line breaks, for each
+        trigger in Winedt `.dat` file.
     """
     with open(file_name, mode='r') as text_file:
-        text = text_file.readlines()
-    return text
-
-
-def get_template(dat_text: List[str], trigger: str) -> List[str]:
-    """Find a template snippet in .dat file.
-
-    Parameters
-    ----------
-    dat_text : List[str]
-        List of text lines from Winedt `.dat` file of multi-line template
-        snippets.
-    trigger : str
-        Trigger string for snippet.
-
-    Returns
-    -------
-    body : List[str]
-        List of text lines for specified snippet body.
-    """
-    start = dat_text.index(f"{trigger}\n") + 1
-    stop = dat_text.index(f"-{trigger}-\n")
-    return [escape_body(x[:-1]) for x in dat_text[start:stop]]
+        text = text_file.read()
+    templates = {}
+    for match in TEMPLATE.finditer(text):
+        lines = match.group(2).split('\n')[:-1]
+        templates.setdefault(match.group(1), escape_body(lines))
+    return templates
 
 
-def next_ini_line(file: TextIOBase, check: re.Pattern) -> re.Match:
-    """Read next line in .ini file and check match.
+def read_ini(file_name: str) -> Iterator[Tuple[str, str]]:
+    """Read trigger and macro of each entry in .ini file.
 
     Parameters
     ----------
-    file : io.TextIO
-        Text file object for Winedt active string `.ini` file.
-    check : re.Pattern
-        Regex pattern to match with next line of `file`.
-
-    Returns
-    -------
-    match: re.Match
-        Result of matching next line of `file` against `check`.
-    """
-    line = file.readline()
-    if not line:
-        return None
-    match = check.match(line)
-    return match
-
-
-def get_ini_trigger(file: TextIOBase) -> str:
-    """Get trigger for next snippet
-
-    Parameters
-    ----------
-    file : io.TextIO
-        Text file object for Winedt active string `.ini` file.
+    file_name : str
+        Name of Winedt active string `.ini` file.
 
-    Returns
-    -------
+    Yields
+    ------
     trigger : str
         Trigger string for snippet, spaces stripped.
+    macro : str
+        Contents of Winedt macro for active string.
     """
-    line_match = next_ini_line(file, TRIGGER)
-    if line_match is None:
-        return None
-    trigger = line_match.group(1)
-    return trigger
+    with open(file_name, mode='r') as file:
+        text = file.read()
+    for match in ENTRY.finditer(text):
+        yield match.group(1, 2)
 
 
-def get_ini_macro(file: TextIOBase) -> str:
-    """Get macro for current snippet
+def get_macro_matches(macro: str,
+                      pattern: re.Pattern) -> Tuple[re.Match, int]:
+    """Get match object from macro.
 
     Parameters
     ----------
-    file : io.TextIO
-        Text file object for Winedt active string `.ini` file.
+    macro : str
+        Contents of Winedt macro for active string.
+    pattern : re.Pattern
+        Combined regex pattern, from `_combine`, to match with `macro`.
 
     Returns
     -------
-    macro : str
-        Contents of Winedt macro for active string.
+    match: re.Match
+        Result of matching `macro` against `pattern`.
+    index : int
+        Index of the variant of `pattern` that matched `macro`.
     """
-    file.readline()
-    file.readline()
-    line_match = next_ini_line(file, MACRO)
-    if line_match is None:
-        return None
-    macro = line_match.group(1)
-    return macro
+    match = pattern.match(macro)
+    if match is None:
+        return None, 0
+    return match, VARIANT_INDEX[match.lastgroup]
 
 
-def get_macro_matches(macro: str,
-                      patterns: Sequence[re.Pattern]) -> Tuple[re.Match, int]:
-    """Get match object from macro.
+def get_tail_number(match: re.Match) -> int:
+    """Get the number captured in the matched variant of a combined pattern.
 
     Parameters
     ----------
-    macro : str
-        Contents of Winedt macro for active string.
-    patterns : Sequence[re.Pattern]
-        Regex pattern to match with next line of `file`.
+    match : re.Match
+        Result of matching a macro against a pattern from `_combine`.
 
     Returns
     -------
-    match: re.Match
-        Result of matching `macro` against members of `patterns`.
-    index : int
-        Index of first `patterns` member that matched `macro.
+    number : int
+        First number captured inside the variant group that matched.
     """
-    for index, pattern in enumerate(patterns):
-        match = pattern.match(macro)
-        if match:
-            return match, index
-    return None, 0
+    return int(match.group(match.lastindex + 1))
 
 
-def get_macro_template(macro: str, dat_text: List[str]) -> List[str]:
+def get_macro_template(macro: str, templates: Templates) -> List[str]:
     """Get template text from macro.
 
     Parameters
     ----------
     macro : str
         Contents of Winedt macro for active string.
-    dat_text : List[str]
-        List of text lines from Winedt `.dat` file of multi-line template
-        snippets.
+    templates : Templates = Dict[str, List[str]]
+        Dict of escaped text lines of body for each trigger in Winedt `.dat`
+        file of multi-line template snippets, from `load_templates`.
 
     Returns
     -------
@@ -309,14 +314,13 @@ def get_macro_template(macro: str, dat_text: List[str]) -> List[str]:
     match, index = get_macro_matches(macro, TEMPLATES)
     if match is None:
         return None
-    groups = match.groups()
-    trigger = groups[0]
-    body = get_template(dat_text, trigger)
+    trigger = match.group(1)
+    body = list(templates[trigger])
     if index == 2:
-        line_num = int(groups[1])
+        line_num = get_tail_number(match)
         body[-line_num] += "$1"
     if index == 1:
-        line_num = int(groups[1])
+        line_num = get_tail_number(match)
         body[-line_num] = body[-line_num][:-1] + "$1" + body[-line_num][-1:]
     return body
 
@@ -337,13 +341,12 @@ def get_macro_insert(macro: str) -> str:
     match, index = get_macro_matches(macro, INSERTS)
     if match is None:
         return None
-    groups = match.groups()
-    body = escape_body(groups[0])
+    body = escape_body(match.group(1))
     if index == 0:
         return body
     if index == 1:
         return body[:-1] + "$1" + body[-1:]
-    char_num = int(groups[1])
+    char_num = get_tail_number(match)
     if index == 2:
         return body[:-char_num] + "$1" + body[-char_num:]
     body = body[:-char_num-1] + "$1" + body[-char_num-1:]
@@ -351,17 +354,19 @@ def get_macro_insert(macro: str) -> str:
     return body[:-2] + "$2" + body[-1:]
 
 
-def next_ini_entry(file: TextIOBase,
-                   dat_text: List[str]) -> Snippet:
-    """Read next entry in .ini file
+def make_ini_entry(trigger: str, macro: str,
+                   templates: Templates) -> Snippet:
+    """Make snippet from entry in .ini file
 
     Parameters
     ----------
-    file : io.TextIO
-        Text file object for Winedt active string `.ini` file.
-    dat_text : List[str]
-        List of text lines from Winedt `.dat` file of multi-line template
-        snippets.
+    trigger : str
+        Trigger string for snippet, spaces stripped.
+    macro : str
+        Contents of Winedt macro for active string.
+    templates : Templates = Dict[str, List[str]]
+        Dict of escaped text lines of body for each trigger in Winedt `.dat`
+        file of multi-line template snippets, from `load_templates`.
 
     Returns
     -------
@@ -370,11 +375,7 @@ def next_ini_entry(file: TextIOBase,
         Superset of the info needed by: vscode/latex-utilities/atom snippets
         Derived: `multiline = isinstance(body, list)`, `priority = len(prefix)`
     """
-    trigger = get_ini_trigger(file)
-    macro = get_ini_macro(file)
-    if trigger is None or macro is None:
-        return None
-    body = get_macro_template(macro, dat_text)
+    body = get_macro_template(macro, templates)
     if body is None:
         body = get_macro_insert(macro)
     if body is None:
@@ -406,13 +407,13 @@ def process_ini(ini_file: str, dat_file: str) -> List[Snippet]:
         Derived: `multiline = isinstance(body, list)`, `priority = len(prefix)`
         Type: `Snippet = Dict[str, str]` or `Dict[str, List[str]]`.
     """
-    dat_text = read_dat(dat_file)
+    templates = load_templates(dat_file)
     snippets = []
-    with open(ini_file, mode='r') as file:
-        snip = next_ini_entry(file, dat_text)
-        while snip:
-            snippets.append(snip)
-            snip = next_ini_entry(file, dat_text)
+    for trigger, macro in read_ini(ini_file):
+        snip = make_ini_entry(trigger, macro, templates)
+        if not snip:
+            break
+        snippets.append(snip)
     return snippets
 
 
@@ -429,8 +430,13 @@ def write_data_json(file_name: str, snippets: List[Snippet]):
         Derived: `multiline = isinstance(body, list)`, `priority = len(prefix)`
         Type: `Snippet = Dict[str, str]` or `Dict[str, List[str]]`.
     """
-    with open(file_name, 'w') as file:
-        json.dump(snippets, file, indent=4)
+    if orjson is None:
+        text = json.dumps(snippets, indent=2, ensure_ascii=False)
+        with open(file_name, 'wb') as file:
+            file.write(text.encode('utf-8'))
+    else:
+        with open(file_name, 'wb') as file:
+            file.write(orjson.dumps(snippets, option=orjson.OPT_INDENT_2))
 
 
 def _main():
@@ -4,6 +4,8 @@ Functions
 ---------
 read_data_json
     Import FasTeX snippet data in internal format.
+count_all_tabs
+    Count tab stops in each snippet, for reuse by live snippet conversions.
 convert_vscode
     Convert snippet data to VSCode snippet format.
 convert_atom
@@ -18,7 +20,12 @@ make_snippet_json
 """
 import re
 import json
-from typing import Union, List, Dict, Optional, Sequence
+from functools import lru_cache
+from typing import Union, List, Dict, Optional, Sequence, Tuple
+try:
+    import orjson
+except ImportError:
+    orjson = None
 if __name__ == "__main__":
     import cson
 else:
@@ -29,9 +36,13 @@ Snippet = Dict[str, Body]
 SnippetDict = Dict[str, Snippet]
 AtomSnippetDict = Dict[str, SnippetDict]
 
-TAB_STOP = re.compile(r'(?<!\\)\$(\d)')
+TAB_STOP = re.compile(r'(?<!\\)\$(\d)', re.ASCII)
+# escaped `\$1`, swallowing one more backslash, other escaped `\$`, tab stops
+LIVE_TOKEN = re.compile(r'(\\?\\\$1)|\\\$|(?<!\\)\$(\d)', re.ASCII)
 TEX_OLD = re.compile(r'^\{\\([a-z][a-z]) $')
 DOUBLE_DOLLAR = re.compile(r'\\\$(.*)\\\$')
+# tab stops are single digits
+TAB_TOKENS = tuple(f'${num}' for num in range(10))
 
 
 def read_data_json(file_name: str):
@@ -50,9 +61,11 @@ def read_data_json(file_name: str):
         Derived: `multiline = isinstance(body, list)`, `priority = len(prefix)`
         Type: `Snippet = Dict[str, str]` or `Dict[str, List[str]]`.
     """
-    with open(file_name, 'r') as file:
-        snippets = json.load(file)
-    return snippets
+    if orjson is None:
+        with open(file_name, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    with open(file_name, 'rb') as file:
+        return orjson.loads(file.read())
 
 
 def _count_tabs(body: Body) -> int:
@@ -69,38 +82,50 @@ def _count_tabs(body: Body) -> int:
         Number of distinct tab stops in body.
     """
     if isinstance(body, list):
-        return max((_count_tabs(line) for line in body), default=0)
-    tabs = TAB_STOP.findall(body)
-    return max((int(num) for num in tabs), default=0)
+        body = '\n'.join(body)
+    # tab stops are single digits, so the largest string is the largest number
+    return int(max(TAB_STOP.findall(body), default='0'))
 
 
-def _body_append(body: Body, addendum: str) -> Body:
-    """Add something to end of snippet
+def count_all_tabs(snippets: List[Snippet]) -> List[int]:
+    """Count tab stops in every snippet body.
+
+    Parameters
+    ----------
+    snippets : List[Snippet]
+        List of snippet objects: dict with prefix, body, mode, description.
+        `Snippet =  = Dict[str, str] or Dict[str, List[str]]`.
+
+    Returns
+    -------
+    maxtabs : List[int]
+        Number of distinct tab stops in the body of each snippet. Can be passed
+        as `maxtabs` to several `convert_all_live` calls on the same
+        `snippets`.
     """
-    if isinstance(body, list):
-        return body + [addendum]
-    return body + addendum
+    return [_count_tabs(snip['body']) for snip in snippets]
 
 
-def _body_prepend(body: Body, addendum: str) -> Body:
-    """Add something to start of snippet
+@lru_cache(maxsize=32)
+def _last_tab_pattern(maxtab: int) -> re.Pattern:
+    """Regex for the tab stop `$maxtab`, when it follows a character.
     """
-    if isinstance(body, list):
-        return [addendum] + body
-    return addendum + body
+    return re.compile(fr'(?<=[^\\])\${maxtab}')
 
 
-def _conv_body_vsc(body: Body, endtab: bool = True, maxtab: int = 0) -> Body:
+def _conv_body_vsc(body: Body, endtab: bool = True) -> Body:
     """Convert tab stops for a VSCode snippet
 
+    Finds the maximum tabstop and rewrites it in the same scan of the body.
+    If the body has no escaped dollars, every `$n` is a tab stop, so this is
+    done with string methods instead.
+
     Parameters
     ----------
     body : Body = str or List[str]
         Body of snippet with tabstops `$1`,...,`$n`.
     endtab : bool, optional, default: False
         Do we want a tabstop at the end?
-    maxtab : int, optional, default: 0
-        What is the maximum tabstop, `n`, in the snippet? Unused `if endtab`.
 
     Returns
     -------
@@ -108,11 +133,30 @@ def _conv_body_vsc(body: Body, endtab: bool = True, maxtab: int = 0) -> Body:
         Body of snippet with tabstops: `if endtab:` `$1`,...,`$n`,
         `else:` `$1`,...,`$n-1`,`$0`.
     """
-    if isinstance(body, list):
-        return [_conv_body_vsc(line, endtab, maxtab) for line in body]
-    if endtab or maxtab == 0:
+    if endtab:
+        return body
+    lines = body if isinstance(body, list) else [body]
+    text = '\n'.join(lines)
+    if '\\$' not in text:
+        maxtab = next((tab for tab in TAB_TOKENS[9:0:-1] if tab in text), '')
+        if not maxtab:
+            return body
+        # only replace tabstops that follow a character
+        lines = [line[:1] + line[1:].replace(maxtab, '$0') for line in lines]
+        return lines if isinstance(body, list) else lines[0]
+    tabs = [(match.group(1), num, match.start())
+            for num, line in enumerate(lines)
+            for match in TAB_STOP.finditer(line)]
+    maxtab = max(tabs, default=('0',))[0]
+    if maxtab == '0':
         return body
-    return re.sub(fr'[^\\]\${maxtab}', '$0', body)
+    lines = lines.copy()
+    for tab, num, start in tabs:
+        # only replace tabstops that follow a character
+        if tab == maxtab and start:
+            line = lines[num]
+            lines[num] = line[:start] + '$0' + line[start + 2:]
+    return lines if isinstance(body, list) else lines[0]
 
 
 def convert_one_vsc(snippet: Snippet, prefix: str = '', suffix: str = '',
@@ -135,11 +179,8 @@ def convert_one_vsc(snippet: Snippet, prefix: str = '', suffix: str = '',
     snippet : Snippet = Dict[str, str] or Dict[str, List[str]]
         Snippet object: dict with prefix, body, description.
     """
-    maxtab = 0
-    if not endtab:
-        maxtab = _count_tabs(snippet['body'])
     vsc_prefix = prefix + snippet['prefix'] + suffix
-    vsc_body = _conv_body_vsc(snippet['body'], endtab, maxtab)
+    vsc_body = _conv_body_vsc(snippet['body'], endtab)
     return {'prefix': vsc_prefix, 'body': vsc_body,
             'description': snippet['description']}
 
@@ -167,43 +208,33 @@ def convert_all_vscode(snippets: List[Snippet],
         Dict of snippet objects: dict with prefix, body, description.
         `Snippet =  = Dict[str, str] or Dict[str, List[str]]`.
     """
-    vsc_snippets = {}
-    for snip in snippets:
-        new_snip = convert_one_vsc(snip, prefix, suffix, endtab)
-        vsc_snippets[snip['prefix']] = new_snip
-    return vsc_snippets
+    return {snip['prefix']: convert_one_vsc(snip, prefix, suffix, endtab)
+            for snip in snippets}
 
 
 def _help_body_atom(body: str) -> str:
-    """Helper for converting body for an Atom snippet"""
-    body = body.replace('\\', '\\\\\\\\')
-    body = body.replace('"', '\\"')
-    return body
+    """Helper for converting body for an Atom snippet
+
+    Escapes backslashes for the snippet parser, `cson` escapes for the file.
+    """
+    return body.replace('\\', '\\\\')
 
 
-def _conv_body_atom(body: Body, endtab: bool = True, maxtab: int = 0) -> Body:
+def _conv_body_atom(body: Body) -> Body:
     """Convert body for an Atom snippet
 
     Parameters
     ----------
     body : Body = str or List[str]
         Body of snippet with tabstops `$1`,...,`$n`.
-    endtab : bool, optional, default: False
-        Do we want a tabstop at the end?
-    maxtab : int, optional, default: 0
-        What is the maximum tabstop, `n`, in the snippet? Unused `if endtab`.
 
     Returns
     -------
-    body : Body = str or List[str]
-        Body of snippet with tabstops: `if endtab:` `$1`,...,`$n`,
-        `else:` `$1`,...,`$n-1`,`$0`.
+    body : str
+        Body of snippet with tabstops `$1`,...,`$n`, lines joined.
     """
-    if endtab and maxtab:
-        body = _body_append(body, f'${maxtab + 1}')
     if isinstance(body, list):
-        body = [_help_body_atom(line) for line in body]
-        return '\n'.join(body)
+        return '\n'.join([_help_body_atom(line) for line in body])
     return _help_body_atom(body)
 
 
@@ -220,18 +251,16 @@ def convert_one_atom(snippet: Snippet, prefix: str = '', suffix: str = '',
     suffix : str
         String to append to every snippet trigger.
     endtab : bool, optional, default: False
-        Do we want a tabstop at the end?
+        Do we want a tabstop at the end? Atom bodies are the same either way,
+        accepted to match the other converters.
 
     Returns
     -------
     snippet : Snippet = Dict[str, str] or Dict[str, List[str]]
         Snippet object: dict with prefix, body, description.
     """
-    maxtab = 0
-    if not endtab:
-        maxtab = _count_tabs(snippet['body'])
     atom_prefix = prefix + snippet['prefix'] + suffix
-    atom_body = _conv_body_atom(snippet['body'], endtab, maxtab)
+    atom_body = _conv_body_atom(snippet['body'])
     return {'prefix': atom_prefix, 'body': atom_body,
             "description": snippet['description']}
 
@@ -251,7 +280,8 @@ def convert_all_atom(snippets: List[Snippet],
     suffix : str
         String to append to every snippet trigger.
     endtab : bool, optional, default: False
-        Do we want a tabstop at the end?
+        Do we want a tabstop at the end? Atom bodies are the same either way,
+        accepted to match the other converters.
 
     Returns
     -------
@@ -259,67 +289,71 @@ def convert_all_atom(snippets: List[Snippet],
         Dict of dict of snippet objects: dict with prefix, body.
         `Snippet = Dict[str, str] or Dict[str, List[str]]`.
     """
-    atom_snippets = {}
-    for snip in snippets:
-        new_snip = convert_one_atom(snip, prefix, suffix, endtab)
-        atom_snippets[snip['prefix']] = new_snip
+    atom_snippets = {
+        snip['prefix']: convert_one_atom(snip, prefix, suffix, endtab)
+        for snip in snippets}
     return {'.text.tex.latex': atom_snippets}
 
 
-def _help_body_live(body: str, endtab: bool = True, maxtab: int = 0) -> str:
+def _live_token(match: re.Match) -> str:
+    """Replacement for one match of `LIVE_TOKEN` in a live snippet line
+    """
+    if match.group(2) is not None:
+        return '$$' + match.group(2)
+    if match.group(1) is not None:
+        return '$ 1'
+    return '$'
+
+
+def _help_body_live(body: str, last_tab: Optional[re.Pattern] = None) -> str:
     """Convert tab stops for one line of a live snippet
 
     Parameters
     ----------
     body : str
         Line of body of snippet with tabstops `$1`,...,`$n`.
-    endtab : bool, optional, default: False
-        Do we want a tabstop at the end?
-    maxtab : int, optional, default: 0
-        What is the maximum tabstop, `n`, in the snippet? Unused `if endtab`.
+    last_tab : re.Pattern, optional
+        Pattern for the maximum tabstop, `$n`, from `_last_tab_pattern`.
+        Left as is by default.
 
     Returns
     -------
     body : str
-        Line of body of snippet with tabstops: `if endtab:` `$$1`,...,`$$n`,
-        `else:` `$$1`,...,`$$n-1`,`$0`.
+        Line of body of snippet with tabstops:
+        `if last_tab:` `$$1`,...,`$$n-1`,`$0`, `else:` `$$1`,...,`$$n`.
     """
-    if not endtab or maxtab:
-        body = re.sub(fr'[^\\]\${maxtab}', '$0', body)
-    body = TAB_STOP.sub('$$\\1', body)
-    body = body.replace('\\$1', '$ 1')
-    body = body.replace('\\$', '$')
-    return body
+    if last_tab is not None:
+        body = last_tab.sub('$0', body)
+    return LIVE_TOKEN.sub(_live_token, body)
 
 
-def _conv_body_live(body: Body, endtab: bool = True, maxtab: int = 0) -> Body:
+def _conv_body_live(body: Body, maxtab: int = 0) -> Body:
     """Convert tab stops for a VSCode live snippet
 
     Parameters
     ----------
     body : str
         Body of snippet with tabstops `$1`,...,`$n`.
-    endtab : bool, optional, default: False
-        Do we want a tabstop at the end?
     maxtab : int, optional, default: 0
-        What is the maximum tabstop, `n`, in the snippet? Unused `if endtab`.
+        What is the maximum tabstop, `n`, in the snippet? Left as is if 0.
 
     Returns
     -------
     body : str
-        Body of snippet with tabstops: `if endtab:` `$$1`,...,`$$n`,
-        `else:` `$$1`,...,`$$n-1`,`$0`.
+        Body of snippet with tabstops: `if maxtab:` `$$1`,...,`$$n-1`,`$0`,
+        `else:` `$$1`,...,`$$n`.
     """
+    # look up the pattern once per snippet, not per line
+    last_tab = _last_tab_pattern(maxtab) if maxtab > 0 else None
     if isinstance(body, list):
-        lines = [_help_body_live(line, endtab, maxtab) for line in body]
-        lines = _body_prepend(lines, '$1')
-        return '\\n'.join(lines)
-    body = _help_body_live(body, endtab, maxtab)
-    return _body_prepend(body, '$1')
+        lines = [_help_body_live(line, last_tab) for line in body]
+        return '$1\\n' + '\\n'.join(lines) if body else '$1'
+    return '$1' + _help_body_live(body, last_tab)
 
 
 def convert_one_live(snippet: Snippet, prefix: str = '', suffix: str = '',
-                     endtab: bool = True) -> Snippet:
+                     endtab: bool = True,
+                     maxtab: Optional[int] = None) -> Snippet:
     """Convert a snippet from internal to VSCode format.
 
     Parameters
@@ -332,6 +366,9 @@ def convert_one_live(snippet: Snippet, prefix: str = '', suffix: str = '',
         String to append to every snippet trigger.
     endtab : bool, optional, default: False
         Do we want a tabstop at the end?
+    maxtab : int, optional
+        Number of distinct tab stops in body, if already known. Computed from
+        `snippet` by default. Unused `if endtab`.
 
     Returns
     -------
@@ -339,18 +376,22 @@ def convert_one_live(snippet: Snippet, prefix: str = '', suffix: str = '',
         Snippet object: dict with prefix, body, mode, triggerWhenComplete,
         description and priority.
     """
-    maxtab = 0
-    if not endtab:
-        maxtab = _count_tabs(snippet['body'])
-    live_prefix = r'(^|[^\\])' + prefix + snippet['prefix'] + suffix
-    live_body = _conv_body_live(snippet['body'], endtab, maxtab)
+    body = snippet['body']
+    if endtab:
+        maxtab = 0
+    elif maxtab is None:
+        maxtab = _count_tabs(body)
+    live_body = _conv_body_live(body, maxtab)
+    trigger = snippet['prefix']
+    live_prefix = r'(^|[^\\])' + prefix + trigger + suffix
     return {'prefix': live_prefix, 'body': live_body, 'mode': snippet['mode'],
             'triggerWhenComplete': True, 'description': snippet['description'],
-            'priority': len(snippet['prefix'])}
+            'priority': len(trigger)}
 
 
 def convert_all_live(snippets: List[Snippet],
                      prefix: str = '', suffix: str = '', endtab: bool = True,
+                     maxtabs: Optional[Sequence[int]] = None
                      ) -> List[Snippet]:
     """Convert list of snippets from internal to VSCode format.
 
@@ -365,6 +406,10 @@ def convert_all_live(snippets: List[Snippet],
         String to append to every snippet trigger.
     endtab : bool, optional, default: False
         Do we want a tabstop at the end?
+    maxtabs : Sequence[int], optional
+        Number of distinct tab stops in each body, if already known, e.g. from
+        `count_all_tabs`. Computed from `snippets` by default.
+        Unused `if endtab`. Must be the same length as `snippets`.
     prefix_m, suffix_m, endtab_m
         Versions of `prefix`, `suffix`, `endtab` for multiline snippets.
 
@@ -374,11 +419,13 @@ def convert_all_live(snippets: List[Snippet],
         List of snippet objects: dicts with prefix, body, mode,
         triggerWhenComplete, description, priority.
     """
-    live_snippets = []
-    for snip in snippets:
-        new_snip = convert_one_live(snip, prefix, suffix, endtab)
-        live_snippets.append(new_snip)
-    return live_snippets
+    if maxtabs is None:
+        maxtabs = [None] * len(snippets)
+    if len(maxtabs) != len(snippets):
+        raise ValueError(f'Got {len(maxtabs)} tab stop counts '
+                         f'for {len(snippets)} snippets.')
+    return [convert_one_live(snip, prefix, suffix, endtab, maxtab)
+            for snip, maxtab in zip(snippets, maxtabs)]
 
 
 def _modern_vsc(snippet: Snippet) -> Snippet:
@@ -397,9 +444,11 @@ def _modern_vsc(snippet: Snippet) -> Snippet:
     snippet : Snippet
         Unmodified/modified input.
     """
-    if not isinstance(snippet['body'], str):
+    body = snippet['body']
+    # cheap test before the regex, fails for almost all snippets
+    if not isinstance(body, str) or not body.startswith('{\\'):
         return snippet
-    match = TEX_OLD.match(snippet['body'])
+    match = TEX_OLD.match(body)
     if match is None:
         return snippet
     command = match.group(1)
@@ -432,9 +481,11 @@ def _modern_live(snippet: Snippet) -> (Snippet, Snippet):
     mth_snippet : Snippet
         Maths mode version of snippet.
     """
-    if not (isinstance(snippet['body'], str) or snippet['mode'] == "any"):
+    body = snippet['body']
+    # cheap test before the regex, fails for almost all snippets
+    if not isinstance(body, str) or not body.startswith('{\\'):
         return snippet
-    match = TEX_OLD.match(snippet['body'])
+    match = TEX_OLD.match(body)
     if match is None:
         return snippet
     command = match.group(1)
@@ -456,9 +507,44 @@ def _un_dollar(snippet: Snippet):
         Snippet to modify *in place*.
     """
     body = snippet['body']
-    if isinstance(body, list) or DOUBLE_DOLLAR.search(body) is None:
+    if isinstance(body, list):
         return
-    snippet['body'] = DOUBLE_DOLLAR.sub(r'\(\1\)', body)
+    body, count = DOUBLE_DOLLAR.subn(r'\(\1\)', body)
+    if count:
+        snippet['body'] = body
+
+
+def _join_rules(rules: Sequence[re.Pattern]) -> Tuple[re.Pattern, ...]:
+    """Combine regex patterns into one alternation, where that is safe.
+
+    `any(rule.search(x) for rule in rules)` and `any(rule.match(x) ...)` are
+    unchanged, but the combined pattern scans `x` only once. Patterns with
+    groups, which could clash or be renumbered, or with different flags are
+    left separate.
+
+    Parameters
+    ----------
+    rules : Sequence[re.Pattern]
+        Regex patterns to combine.
+
+    Returns
+    -------
+    rules : Tuple[re.Pattern, ...]
+        The single combined pattern, or the original patterns.
+    """
+    rules = tuple(rules)
+    if len(rules) < 2 or any(rule.groups for rule in rules):
+        return rules
+    flags = {rule.flags for rule in rules}
+    if len(flags) > 1 or not all(isinstance(rule.pattern, str)
+                                 for rule in rules):
+        return rules
+    try:
+        joined = '|'.join(f'(?:{rule.pattern})' for rule in rules)
+        return (re.compile(joined, flags.pop()),)
+    except re.error:
+        # e.g. inline global flags, which must start the pattern
+        return rules
 
 
 def _choose(snippet: Snippet,
@@ -496,9 +582,14 @@ def _choose(snippet: Snippet,
         return False
     if any(rule.match(snippet['prefix']) for rule in prefix):
         return False
-    if (not multi) and any(rule.search(the_body) for rule in body):
-        return False
-    return not any(rule.search(line) for rule in body for line in the_body)
+    if not body:
+        return True
+    # scan each line once against all rules
+    for line in the_body if multi else (the_body,):
+        for rule in body:
+            if rule.search(line):
+                return False
+    return True
 
 
 def apply_options(snippets: List[Snippet],
@@ -547,6 +638,8 @@ def apply_options(snippets: List[Snippet],
     modern: bool = kwds.pop('modern', False)
     if kwds:
         raise KeyError('Unknown key words: ' + ', '.join(kwds.keys()))
+    # reused for every snippet
+    prefix, body = _join_rules(prefix), _join_rules(body)
     new_snippets = []
     for snip in snippets:
         if not _choose(snip, prefix, body, multiline, singleline):
@@ -567,10 +660,28 @@ def apply_options(snippets: List[Snippet],
     return new_snippets
 
 
+def _write_json(obj, file_name: str, pretty: bool = True):
+    """Write an object to a `.json` file, with orjson if available.
+
+    Indented by 2 spaces if `pretty`, otherwise compact.
+    """
+    if orjson is None:
+        indent, separators = (2, None) if pretty else (None, (',', ':'))
+        text = json.dumps(obj, indent=indent, separators=separators,
+                          ensure_ascii=False, check_circular=False)
+        with open(file_name, 'wb') as file:
+            file.write(text.encode('utf-8'))
+    else:
+        option = orjson.OPT_INDENT_2 if pretty else None
+        with open(file_name, 'wb') as file:
+            file.write(orjson.dumps(obj, option=option))
+
+
 def make_snippet_json(snippets: Union[Snippet, SnippetDict, None] = None,
                       snip_file: str = 'latex.json',
                       live_snippets: Optional[List[Snippet]] = None,
-                      live_file: str = 'latexUtilsLiveSnippets.json'):
+                      live_file: str = 'latexUtilsLiveSnippets.json',
+                      pretty: bool = True):
     """Write snippets in the chosen format to .json files.
 
     Parameters
@@ -585,13 +696,14 @@ def make_snippet_json(snippets: Union[Snippet, SnippetDict, None] = None,
         triggerWhenComplete, description, priority.
     live_file : str, optional, default: liveSnippets.json
         Name of file for live snippets.
+    pretty : bool, optional, default: True
+        Indent the files for reading? Otherwise written compactly, which is
+        faster but hard to copy by hand.
     """
     if snippets is not None:
-        with open(snip_file, 'w') as file:
-            json.dump(snippets, file, indent=4)
+        _write_json(snippets, snip_file, pretty)
     if live_snippets is not None:
-        with open(live_file, 'w') as file:
-            json.dump(live_snippets, file, indent=4)
+        _write_json(live_snippets, live_file, pretty)
 
 
 def make_snippet_cson(snippets: Optional[AtomSnippetDict] = None,
@@ -607,8 +719,8 @@ def make_snippet_cson(snippets: Optional[AtomSnippetDict] = None,
         Name of file for normal snippets.
     """
     if snippets is not None:
-        with open(snip_file, 'w') as file:
-            cson.dump(snippets, file, indent=4, level=-1)
+        with open(snip_file, 'wb') as file:
+            cson.dump_bytes(snippets, file, indent=4, level=-1)
 
 
 def _main():